@@ -4,10 +4,27 @@ import struct
 import time
 import math
 
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError: # Fall back to the NumPy generator
+    njit = None
+
 HOST = 'localhost' # Or Windows IP if needed
 PORT = 9999
 WIDTH = 400
 HEIGHT = 300
+FRAMES = 63 # ~2*pi / 0.1, so the animation loops without a jump
+
+# Header: PIXL [surface:4] [w:4] [h:4] [fmt:4] [len:4]
+_PIXL_HDR = struct.Struct('<4sIIIII')
+
+# Pixel coordinate grids, cached once (scaled by the stripe frequency)
+xs = np.arange(WIDTH) * 0.05
+ys = np.arange(HEIGHT) * 0.05
+xs2d, ys2d = np.meshgrid(xs, ys)
+sumxy = xs2d + ys2d
 
 def connect():
     s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -32,33 +49,60 @@ def connect():
         print(f"❌ Connection failed: {e}")
         return None
 
-def create_frame(t):
+def _fill_numpy(frame, t):
+    # Moving stripes
+    frame[..., 0] = (np.sin(xs2d + t) + 1) * 127    # R? or B?
+    frame[..., 1] = (np.sin(ys2d + t) + 1) * 127    # G
+    frame[..., 2] = (np.sin(sumxy - t) + 1) * 127   # B? or R?
+    frame[..., 3] = 255                             # A
+
+    # Draw a white box in middle
+    frame[HEIGHT//2 - 49:HEIGHT//2 + 50, WIDTH//2 - 49:WIDTH//2 + 50] = (255, 255, 255, 255)
+
+if njit:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _fill(frame, t):
+        H, W, _ = frame.shape
+        for y in prange(H):
+            g = np.uint8((math.sin(y * 0.05 + t) + 1) * 127)
+            in_box = H//2 - 50 < y < H//2 + 50
+            for x in range(W):
+                if in_box and W//2 - 50 < x < W//2 + 50:
+                    frame[y, x, 0] = 255
+                    frame[y, x, 1] = 255
+                    frame[y, x, 2] = 255
+                else:
+                    frame[y, x, 0] = np.uint8((math.sin(x * 0.05 + t) + 1) * 127)
+                    frame[y, x, 1] = g
+                    frame[y, x, 2] = np.uint8((math.sin((x + y) * 0.05 - t) + 1) * 127)
+                frame[y, x, 3] = 255
+else:
+    _fill = _fill_numpy
+
+def create_frame(t, frame=None):
     # Create a nice animated pattern
     # format is BGRA (little endian ARGB) or RGBA? Let's try to generate visible colors
-    
-    pixels = bytearray(WIDTH * HEIGHT * 4)
-    
-    for y in range(HEIGHT):
-        for x in range(WIDTH):
-            idx = (y * WIDTH + x) * 4
-            
-            # Moving stripes
-            r = int((math.sin(x * 0.05 + t) + 1) * 127)
-            g = int((math.sin(y * 0.05 + t) + 1) * 127)
-            b = int((math.sin((x+y) * 0.05 - t) + 1) * 127)
-            
-            # Draw a white box in middle
-            if WIDTH//2 - 50 < x < WIDTH//2 + 50 and HEIGHT//2 - 50 < y < HEIGHT//2 + 50:
-                r, g, b = 255, 255, 255
-            
-            # B G R A (Assuming little endian writing to int) 
-            # If win-way treats as bytes:
-            pixels[idx] = r     # R? or B?
-            pixels[idx+1] = g   # G
-            pixels[idx+2] = b   # B? or R?
-            pixels[idx+3] = 255 # A
-            
-    return pixels
+    # Pass a preallocated (HEIGHT, WIDTH, 4) uint8 frame to render in place
+    if frame is None:
+        frame = np.empty((HEIGHT, WIDTH, 4), np.uint8)
+    _fill(frame, t)
+    return frame
+
+def prerender():
+    # Render the whole animation ring once up front
+    frames = np.empty((FRAMES, HEIGHT, WIDTH, 4), np.uint8)
+    for i in range(FRAMES):
+        create_frame(i * 2 * math.pi / FRAMES, frames[i])
+    return frames
+
+def send_frame(s, header, frame):
+    # Header and pixels in one sendmsg, finish a short send with sendall
+    data = memoryview(frame).cast('B')
+    sent = s.sendmsg([header, data])
+    if sent < len(header):
+        s.sendall(header[sent:])
+        sent = len(header)
+    s.sendall(data[sent - len(header):])
 
 def main():
     s = connect()
@@ -74,23 +118,20 @@ def main():
         print("Could not connect. Usage: python3 pixel-test.py [HOST_IP]")
         return
 
+    frames = prerender()
     print("🚀 Sending frames... Press Ctrl+C to stop")
-    t = 0.0
+    i = 0
     surface_id = 999
     
+    # format 0 = ARGB8888, 1 = XRGB8888
+    header = _PIXL_HDR.pack(b'PIXL', surface_id, WIDTH, HEIGHT, 1, frames[0].nbytes)
+    
     try:
         while True:
-            data = create_frame(t)
-            data_len = len(data)
-            
-            # Header: PIXL [surface:4] [w:4] [h:4] [fmt:4] [len:4]
-            # format 0 = ARGB8888, 1 = XRGB8888
-            header = struct.pack('<4sIIIII', b'PIXL', surface_id, WIDTH, HEIGHT, 1, data_len)
-            
-            s.sendall(header + data)
-            print(f"Sent frame {t:.1f}", end='\r')
+            send_frame(s, header, frames[i])
+            print(f"Sent frame {i}", end='\r')
             
-            t += 0.1
+            i = (i + 1) % FRAMES
             time.sleep(0.033) # 30 FPS
             
     except KeyboardInterrupt:
@@ -88,6 +88,7 @@ pub async fn start_server(_config: ServerConfig) -> std::io::Result<ServerHandle
             info!("🚀 Spawning WSL Proxy via Stdio...");
             
             // Command: wsl -d FedoraLinux-43 bash -c "python3 ~/wsl-proxy.py --stdio"
+            // (winway_wire.py must sit next to wsl-proxy.py, see README)
             // Use --exec or bash -c to ensure environment? bash -c is safer for ~ expansion.
             let mut child = Command::new("wsl")
                 .args(["-d", "FedoraLinux-43", "bash", "-c", "python3 ~/wsl-proxy.py --stdio"])
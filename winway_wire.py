@@ -0,0 +1,73 @@
+"""
+Wayland wire protocol helpers for the WSL proxy.
+Plain typed Python; compile with `mypyc winway_wire.py` and the
+extension module is picked up in place of this file. wsl-proxy.py
+imports these and refuses to start without them, so deploy the two
+files together.
+"""
+
+import struct
+
+HEADER_SIZE = 8
+
+_WL_HDR = struct.Struct('<II')            # object_id, (size << 16) | opcode
+_U32 = struct.Struct('<I')
+_I32 = struct.Struct('<i')
+
+# Fixed-shape events: header followed by N uint args, indexed by N
+_UINT_EVENTS = [struct.Struct('<II' + 'I' * n) for n in range(5)]
+
+def split_messages(data: bytes) -> list[tuple[int, int, bytes]]:
+    # Complete messages in data as (object_id, opcode, payload)
+    messages: list[tuple[int, int, bytes]] = []
+    end = len(data)
+    offset = 0
+    while end - offset >= HEADER_SIZE:
+        object_id, opcode_and_size = _WL_HDR.unpack_from(data, offset)
+        size: int = opcode_and_size >> 16
+        if size < HEADER_SIZE or end - offset < size:
+            break
+        messages.append((object_id, opcode_and_size & 0xFFFF, data[offset + HEADER_SIZE : offset + size]))
+        offset += size
+    return messages
+
+def read_uint(data: bytes, offset: int) -> tuple[int, int]:
+    return _U32.unpack_from(data, offset)[0], offset + 4
+
+def read_int(data: bytes, offset: int) -> tuple[int, int]:
+    return _I32.unpack_from(data, offset)[0], offset + 4
+
+def read_string(data: bytes, offset: int) -> tuple[str, int]:
+    length, offset = read_uint(data, offset)
+    s = data[offset:offset+length-1].decode('utf-8').strip('\x00')
+    padding = (4 - (length % 4)) % 4
+    return s, offset + length + padding
+
+def encode_message(object_id: int, opcode: int, *args: object) -> bytes:
+    payload = bytearray()
+    for arg in args:
+        if isinstance(arg, int):
+            payload.extend(_U32.pack(arg & 0xFFFFFFFF))
+        elif isinstance(arg, str):
+            encoded = arg.encode('utf-8') + b'\0'
+            padding = (4 - (len(encoded) % 4)) % 4
+            payload.extend(_U32.pack(len(encoded)))
+            payload.extend(encoded)
+            payload.extend(b'\0' * padding)
+        elif isinstance(arg, bytes):
+            payload.extend(arg)
+
+    size = HEADER_SIZE + len(payload)
+    header = _WL_HDR.pack(object_id, (size << 16) | (opcode & 0xFFFF))
+    return header + payload
+
+def encode_uints(object_id: int, opcode: int, *args: int) -> bytes:
+    # Fast path for events whose args are all uints: one pack call
+    st = _UINT_EVENTS[len(args)]
+    return st.pack(object_id, (st.size << 16) | opcode, *args)
+
+def encode_global_payload(name: int, interface: str, version: int) -> bytes:
+    # wl_registry.global args (name, interface, version), without the header
+    encoded = interface.encode('utf-8') + b'\0'
+    padded = (len(encoded) + 3) & ~3
+    return struct.pack(f'<II{padded}sI', name, len(encoded), encoded, version)
@@ -3,6 +3,8 @@
 WSL Wayland Proxy v5.0 (Stdio Pipe Mode)
 Redirects PIXL data to stdout and reads INPT from stdin.
 Logs to stderr.
+Needs winway_wire.py (or its mypyc build) next to this script for the
+Wayland wire helpers.
 """
 
 import os
@@ -10,12 +12,39 @@ import sys
 import socket
 import struct
 import mmap
-import select
+import selectors
 import argparse
 import time
-
-# Wayland wire protocol constants
-HEADER_SIZE = 8
+import array
+import functools
+
+try:
+    import numpy as np
+except ImportError: # Strided buffers fall back to one iovec per row
+    np = None
+
+# Per-message trace logging (WINWAY_DEBUG=1)
+_DEBUG = os.environ.get('WINWAY_DEBUG', '') not in ('', '0')
+
+try:
+    # Wire helpers and constants; also the mypyc build target (see README)
+    from winway_wire import (HEADER_SIZE, split_messages, read_uint, read_int,
+                             read_string, encode_message, encode_uints,
+                             encode_global_payload)
+except ImportError as e:
+    sys.exit(f"❌ winway_wire not found next to {sys.argv[0]}: "
+             f"copy winway_wire.py alongside wsl-proxy.py ({e})")
+
+# Precompiled wire formats
+_WL_HDR = struct.Struct('<II')            # object_id, (size << 16) | opcode
+_PIXL_HDR = struct.Struct('<4sIIIII')     # PIXL, surface, w, h, fmt, len
+_INPT = struct.Struct('<4sIII')           # INPT, type, p1, p2 (+4 pad)
+
+# Hot input events (wl_pointer.motion, wl_keyboard.key / wl_pointer.button)
+_POINTER_MOTION = struct.Struct('<IIIII') # header, time, x, y (wl_fixed bits)
+_POINTER_MOTION_WORD = (_POINTER_MOTION.size << 16) | 2
+_KEY_EVENT = struct.Struct('<IIIIII')     # header, serial, time, key/button, state
+_KEY_EVENT_WORD = (_KEY_EVENT.size << 16) | 3 # key and button are both opcode 3
 
 # Standard globals
 GLOBALS = [
@@ -28,136 +57,141 @@ GLOBALS = [
     (7, "wl_data_device_manager", 3),
 ]
 
+# Globals are static, so their events only need the registry id spliced in
+# (size << 16 | opcode 0, payload) per global
+_GLOBAL_EVENTS = [((HEADER_SIZE + len(p)) << 16, p)
+                  for p in (encode_global_payload(*g) for g in GLOBALS)]
+
 # SHM formats
 SHM_FORMAT_ARGB8888 = 0
 SHM_FORMAT_XRGB8888 = 1
 
+# Ancillary data constants for the client recvmsg path
+SOL_SOCKET = socket.SOL_SOCKET
+SCM_RIGHTS = socket.SCM_RIGHTS
+MSG_DONTWAIT = socket.MSG_DONTWAIT
+ANC_BUFSIZE = socket.CMSG_LEN(1024)
+
+# madvise ranges must start on a page boundary
+PAGE_MASK = ~(mmap.PAGESIZE - 1)
+
+# Max buffers per writev/sendmsg call
+IOV_MAX = os.sysconf('SC_IOV_MAX')
+
+def write_iov(write, iov):
+    # Scatter-gather write via os.writev/sock.sendmsg, retrying short writes
+    bufs = [m for m in (memoryview(b).cast('B') for b in iov) if m.nbytes]
+    i = 0
+    while i < len(bufs):
+        n = write(bufs[i:i + IOV_MAX])
+        while n > 0:
+            if n >= len(bufs[i]):
+                n -= len(bufs[i])
+                i += 1
+            else:
+                bufs[i] = bufs[i][n:]
+                n = 0
+
 class WaylandClient:
+    __slots__ = ('sock', 'proxy', 'objects', 'surfaces', 'buffers', 'shm_pools',
+                 'keyboards', 'pointers', 'serial', 'connected_at',
+                 '_dispatch', '_log', '_sendall')
+
     def __init__(self, sock, proxy):
         self.sock = sock
         self.proxy = proxy
+        self._log = proxy.log
+        self._sendall = sock.sendall
         self.objects = {1: ("wl_display", 1)}
         self.surfaces = {} # object_id -> buffer_id
         self.buffers = {}  # buffer_id -> (pool_id, offset, w, h, stride, fmt)
-        self.shm_pools = {} # pool_id -> (fd, mm, size)
+        self.shm_pools = {} # pool_id -> (fd, mm, mv, size)
+        self.keyboards = set() # wl_keyboard ids, for input fan-out
+        self.pointers = set()  # wl_pointer ids
         self.serial = 0
         self.connected_at = time.time()
+        # Interface name -> handler(oid, op, pay, fds)
+        self._dispatch = {
+            "wl_display": self.handle_display,
+            "wl_registry": self.handle_registry,
+            "wl_compositor": self.handle_compositor,
+            "wl_shm": self.handle_shm,
+            "wl_shm_pool": self.handle_shm_pool,
+            "wl_buffer": self.handle_buffer,
+            "wl_surface": self.handle_surface,
+            "xdg_wm_base": self.handle_xdg_wm_base,
+            "xdg_surface": self.handle_xdg_surface,
+            "xdg_toplevel": self.handle_xdg_toplevel,
+            "wl_seat": self.handle_seat,
+            "wl_pointer": self.handle_pointer,
+            "wl_keyboard": self.handle_keyboard,
+            "wl_data_device_manager": self.handle_data_device_manager,
+            "wl_region": self.handle_region,
+            "wl_subcompositor": self.handle_subcompositor,
+            "wl_callback": self.handle_callback,
+        }
         
     def next_serial(self):
-        self.serial += 1
+        self.serial = (self.serial + 1) & 0xFFFFFFFF # u32 on the wire
         return self.serial
 
     def close(self):
-        # self.proxy.log(f"🧹 Cleaning up client {self.sock.fileno()}")
+        # self._log(f"🧹 Cleaning up client {self.sock.fileno()}")
+        # Queued frames may still point into our maps; send them or drop
+        # them here so nothing stale reaches the next write
+        self.proxy.flush_pixl()
+        self.proxy.pending.clear()
         # Cleanup SHM maps
-        for pid, (fd, mm, size) in self.shm_pools.items():
-            if mm: mm.close()
+        for pid, (fd, mm, mv, size) in self.shm_pools.items():
+            try:
+                if mv: mv.release()
+                if mm: mm.close()
+            except BufferError: # still exported, unmapped with its last view
+                pass
             if fd >= 0: os.close(fd)
         self.sock.close()
 
     def send(self, data):
         try:
-            self.sock.sendall(data)
+            self._sendall(data)
         except:
             pass
             
-    def decode_header(self, data):
-        if len(data) < HEADER_SIZE:
-            return None, None, None, data
-        object_id, opcode_and_size = struct.unpack('<II', data[:HEADER_SIZE])
-        size = opcode_and_size >> 16
-        opcode = opcode_and_size & 0xFFFF
-        return object_id, opcode, size, data[HEADER_SIZE:]
-    
-    def read_uint(self, data, offset):
-        return struct.unpack('<I', data[offset:offset+4])[0], offset + 4
-    
-    def read_int(self, data, offset):
-        return struct.unpack('<i', data[offset:offset+4])[0], offset + 4
-    
-    def read_string(self, data, offset):
-        length, offset = self.read_uint(data, offset)
-        s = data[offset:offset+length-1].decode('utf-8').strip('\x00')
-        padding = (4 - (length % 4)) % 4
-        return s, offset + length + padding
-
-    def encode_message(self, object_id, opcode, *args):
-        payload = bytearray()
-        for arg in args:
-            if isinstance(arg, int):
-                payload.extend(struct.pack('<I', arg & 0xFFFFFFFF))
-            elif isinstance(arg, str):
-                encoded = arg.encode('utf-8') + b'\0'
-                padding = (4 - (len(encoded) % 4)) % 4
-                payload.extend(struct.pack('<I', len(encoded)))
-                payload.extend(encoded)
-                payload.extend(b'\0' * padding)
-            elif isinstance(arg, bytes):
-                 payload.extend(arg)
-                 
-        size = HEADER_SIZE + len(payload)
-        header = struct.pack('<II', object_id, (size << 16) | (opcode & 0xFFFF))
-        return header + payload
+    # Module-level wire helpers from winway_wire
+    read_uint = staticmethod(read_uint)
+    read_int = staticmethod(read_int)
+    read_string = staticmethod(read_string)
+    encode_message = staticmethod(encode_message)
+    encode_uints = staticmethod(encode_uints)
 
     def handle_message(self, data, fds):
-        offset = 0
+        # Hot loop: bind lookups to locals once per read
+        log = self._log
+        objects = self.objects
+        dispatch = self._dispatch
         responses = []
         
-        while offset < len(data):
-            if len(data) - offset < HEADER_SIZE:
-                break
-                
-            object_id, opcode, size, _ = self.decode_header(data[offset:])
-            
-            if size < 8 or len(data) - offset < size:
-                break
+        try:
+            for object_id, opcode, payload in split_messages(data):
+                if _DEBUG: log(f"📥 ID={object_id} Op={opcode} Sz={HEADER_SIZE + len(payload)}") # LOG
                 
-            self.proxy.log(f"📥 ID={object_id} Op={opcode} Sz={size}") # LOG
-            
-            payload = data[offset + HEADER_SIZE : offset + size]
-            offset += size
-            
-            obj_info = self.objects.get(object_id)
-            if not obj_info:
-                self.proxy.log(f"⚠️ Unknown object {object_id}")
-                continue
+                obj_info = objects.get(object_id)
+                if not obj_info:
+                    log(f"⚠️ Unknown object {object_id}")
+                    continue
+                    
+                obj_type, obj_version = obj_info
                 
-            obj_type, obj_version = obj_info
-            
-            # Dispatch
-            if obj_type == "wl_display":
-                responses.extend(self.handle_display(opcode, payload))
-            elif obj_type == "wl_registry":
-                responses.extend(self.handle_registry(object_id, opcode, payload))
-            elif obj_type == "wl_compositor":
-                responses.extend(self.handle_compositor(object_id, opcode, payload))
-            elif obj_type == "wl_shm":
-                responses.extend(self.handle_shm(object_id, opcode, payload, fds))
-            elif obj_type == "wl_shm_pool":
-                responses.extend(self.handle_shm_pool(object_id, opcode, payload))
-            elif obj_type == "wl_buffer":
-                responses.extend(self.handle_buffer(object_id, opcode, payload))
-            elif obj_type == "wl_surface":
-                responses.extend(self.handle_surface(object_id, opcode, payload))
-            elif obj_type == "xdg_wm_base":
-                responses.extend(self.handle_xdg_wm_base(object_id, opcode, payload))
-            elif obj_type == "xdg_surface":
-                responses.extend(self.handle_xdg_surface(object_id, opcode, payload))
-            elif obj_type == "xdg_toplevel":
-                responses.extend(self.handle_xdg_toplevel(object_id, opcode, payload))
-            elif obj_type == "wl_seat":
-                responses.extend(self.handle_seat(object_id, opcode, payload))
-            elif obj_type == "wl_data_device_manager":
-                 responses.extend(self.handle_data_device_manager(object_id, opcode, payload))
-            elif obj_type == "wl_region":
-                 responses.extend(self.handle_region(object_id, opcode, payload))
-            elif obj_type == "wl_subcompositor":
-                 responses.extend(self.handle_subcompositor(object_id, opcode, payload))
-            elif obj_type == "wl_callback":
-                 pass
-            else:
-                self.proxy.log(f"📝 Unhandled {obj_type} {object_id} op {opcode}")
-
+                # Dispatch
+                handler = dispatch.get(obj_type)
+                if handler:
+                    responses.extend(handler(object_id, opcode, payload, fds))
+                else:
+                    if _DEBUG: log(f"📝 Unhandled {obj_type} {object_id} op {opcode}")
+        finally:
+            # Pixels must be out before the client sees wl_buffer.release,
+            # and before a failed read gets this client closed and unmapped
+            self.proxy.flush_pixl()
         for resp in responses:
             self.send(resp)
             
@@ -170,29 +204,29 @@ class WaylandClient:
             if iface == "wl_keyboard":
                 ser = self.next_serial()
                 self.send(self.encode_message(obj_id, 4, ser, sid, b''))
-                self.proxy.log(f"📤 Auto-Focus Keyboard {obj_id}")
+                if _DEBUG: self._log(f"📤 Auto-Focus Keyboard {obj_id}")
             elif iface == "wl_pointer":
-                 self.send(self.encode_message(obj_id, 4, self.next_serial(), sid, 0, 0))
-                 self.proxy.log(f"📤 Auto-Focus Pointer {obj_id}")
+                 self.send(self.encode_uints(obj_id, 4, self.next_serial(), sid, 0, 0))
+                 if _DEBUG: self._log(f"📤 Auto-Focus Pointer {obj_id}")
 
-    def handle_display(self, opcode, payload):
+    def handle_display(self, oid, opcode, payload, fds):
         res = []
         pos = 0
         if opcode == 0: # sync
             cb_id, pos = self.read_uint(payload, pos)
             self.objects[cb_id] = ("wl_callback", 1)
-            res.append(self.encode_message(cb_id, 0, int(time.time()*1000)&0xFFFFFFFF))
-            self.proxy.log(f"📤 sync -> {cb_id}")
+            res.append(self.encode_uints(cb_id, 0, int(time.time()*1000)&0xFFFFFFFF))
+            if _DEBUG: self._log(f"📤 sync -> {cb_id}")
             del self.objects[cb_id]
         elif opcode == 1: # get_registry
             reg_id, pos = self.read_uint(payload, pos)
             self.objects[reg_id] = ("wl_registry", 1)
-            for name, interface, version in GLOBALS:
-                res.append(self.encode_message(reg_id, 0, name, interface, version))
-            self.proxy.log(f"📤 get_registry -> {reg_id}")
+            for size_word, body in _GLOBAL_EVENTS:
+                res.append(_WL_HDR.pack(reg_id, size_word) + body)
+            if _DEBUG: self._log(f"📤 get_registry -> {reg_id}")
         return res
 
-    def handle_registry(self, oid, op, pay):
+    def handle_registry(self, oid, op, pay, fds):
         res = []
         pos = 0
         if op == 0: # bind
@@ -200,14 +234,14 @@ class WaylandClient:
             iface, pos = self.read_string(pay, pos)
             ver, pos = self.read_uint(pay, pos)
             nid, pos = self.read_uint(pay, pos)
-            self.proxy.log(f"📝 BIND request: name={name} iface='{iface}' v={ver} nid={nid}")
+            if _DEBUG: self._log(f"📝 BIND request: name={name} iface='{iface}' v={ver} nid={nid}")
             self.objects[nid] = (iface, ver)
             
             if iface == "wl_shm":
-                res.append(self.encode_message(nid, 0, SHM_FORMAT_ARGB8888))
-                res.append(self.encode_message(nid, 0, SHM_FORMAT_XRGB8888))
+                res.append(self.encode_uints(nid, 0, SHM_FORMAT_ARGB8888))
+                res.append(self.encode_uints(nid, 0, SHM_FORMAT_XRGB8888))
             elif iface == "wl_seat":
-                res.append(self.encode_message(nid, 0, 3)) # caps
+                res.append(self.encode_uints(nid, 0, 3)) # caps
                 res.append(self.encode_message(nid, 1, "win-way-seat"))
             elif iface == "wl_output":
                 # wl_output events:
@@ -219,28 +253,28 @@ class WaylandClient:
                 # Send geometry
                 res.append(self.encode_message(nid, 0, 0, 0, 1920, 1080, 0, "WinWay", "Monitor", 0))
                 # Send mode (current | preferred = 0x3)
-                res.append(self.encode_message(nid, 1, 3, 1920, 1080, 60000))
+                res.append(self.encode_uints(nid, 1, 3, 1920, 1080, 60000))
                 
                 if ver >= 2:
                     # Send scale (factor=1) -> Opcode 3
-                    res.append(self.encode_message(nid, 3, 1))
+                    res.append(self.encode_uints(nid, 3, 1))
                     # Send done -> Opcode 2
-                    res.append(self.encode_message(nid, 2))
+                    res.append(self.encode_uints(nid, 2))
         return res
 
-    def handle_compositor(self, oid, op, pay):
+    def handle_compositor(self, oid, op, pay, fds):
         pos = 0
         if op == 0: # create_surface
             sid, pos = self.read_uint(pay, pos)
             self.objects[sid] = ("wl_surface", 4)
-            self.proxy.log(f"📤 create_surface -> {sid}")
+            if _DEBUG: self._log(f"📤 create_surface -> {sid}")
             self.try_focus()
         elif op == 1: # create_region
             rid, pos = self.read_uint(pay, pos)
             self.objects[rid] = ("wl_region", 1)
         return []
 
-    def handle_subcompositor(self, oid, op, pay):
+    def handle_subcompositor(self, oid, op, pay, fds):
         pos = 0
         if op == 0: # destroy
             if oid in self.objects: del self.objects[oid]
@@ -251,12 +285,12 @@ class WaylandClient:
             self.objects[sub_id] = ("wl_subsurface", 1)
         return []
 
-    def handle_region(self, oid, op, pay):
+    def handle_region(self, oid, op, pay, fds):
         if op == 0: # destroy
             if oid in self.objects: del self.objects[oid]
         return []
 
-    def handle_data_device_manager(self, oid, op, pay):
+    def handle_data_device_manager(self, oid, op, pay, fds):
         pos = 0
         if op == 0: # get_data_device
             id, pos = self.read_uint(pay, pos)
@@ -277,15 +311,21 @@ class WaylandClient:
                 fd = fds.pop(0)
                 try:
                     mm = mmap.mmap(fd, size, mmap.MAP_SHARED, mmap.PROT_READ)
-                    self.shm_pools[pid] = (fd, mm, size)
-                    self.proxy.log(f"📤 create_pool -> {pid} ({size})")
+                    self.shm_pools[pid] = (fd, mm, memoryview(mm), size)
+                    if _DEBUG: self._log(f"📤 create_pool -> {pid} ({size})")
                 except Exception as e:
-                    self.proxy.log(f"⚠️ mmap fail: {e}")
-                    self.shm_pools[pid] = (fd, None, size)
+                    self._log(f"⚠️ mmap fail: {e}")
+                    self.shm_pools[pid] = (fd, None, None, size)
+                else:
+                    # Pools are streamed front to back on every commit (hint only)
+                    try:
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+                    except (OSError, ValueError):
+                        pass
             self.objects[pid] = ("wl_shm_pool", 1)
         return res
 
-    def handle_shm_pool(self, oid, op, pay):
+    def handle_shm_pool(self, oid, op, pay, fds):
         pos = 0
         if op == 0: # create_buffer
             bid, pos = self.read_uint(pay, pos)
@@ -296,21 +336,23 @@ class WaylandClient:
             fmt, pos = self.read_uint(pay, pos)
             self.objects[bid] = ("wl_buffer", 1)
             self.buffers[bid] = (oid, off, w, h, stride, fmt)
-            self.proxy.log(f"📤 create_buffer -> {bid}")
+            if _DEBUG: self._log(f"📤 create_buffer -> {bid}")
         elif op == 1: # destroy
             if oid in self.shm_pools:
-                fd, mm, sz = self.shm_pools.pop(oid)
+                self.proxy.flush_pixl() # queued frames may still point into it
+                fd, mm, mv, sz = self.shm_pools.pop(oid)
+                if mv: mv.release()
                 if mm: mm.close()
                 if fd >= 0: os.close(fd)
         return []
 
-    def handle_buffer(self, oid, op, pay):
+    def handle_buffer(self, oid, op, pay, fds):
         if op == 0: # destroy
             if oid in self.objects: del self.objects[oid]
             if oid in self.buffers: del self.buffers[oid]
         return []
 
-    def handle_surface(self, oid, op, pay):
+    def handle_surface(self, oid, op, pay, fds):
         res = []
         pos = 0
         try:
@@ -332,140 +374,174 @@ class WaylandClient:
                 if len(pay) < 4: return []
                 cb_id, pos = self.read_uint(pay, pos)
                 self.objects[cb_id] = ("wl_callback", 1)
-                res.append(self.encode_message(cb_id, 0, int(time.time()*1000)&0xFFFFFFFF))
+                res.append(self.encode_uints(cb_id, 0, int(time.time()*1000)&0xFFFFFFFF))
                 del self.objects[cb_id]
             elif op == 6: # commit
                 bid = self.surfaces.get(oid)
                 if bid and bid in self.buffers:
-                    self.proxy.send_pixl(oid, self.buffers[bid], self.shm_pools)
-                    res.append(self.encode_message(bid, 0)) # release
+                    self.proxy.queue_pixl(oid, self.buffers[bid], self.shm_pools)
+                    res.append(self.encode_uints(bid, 0)) # release
         except Exception as e:
-            self.proxy.log(f"⚠️ handle_surface error: {e}")
+            self._log(f"⚠️ handle_surface error: {e}")
         return res
 
-    def handle_xdg_wm_base(self, oid, op, pay):
+    def handle_xdg_wm_base(self, oid, op, pay, fds):
         res = []
         pos = 0
         if op == 2: # get_xdg_surface
             xdg_id, pos = self.read_uint(pay, pos)
             sid, pos = self.read_uint(pay, pos)
             self.objects[xdg_id] = ("xdg_surface", 3)
-            self.proxy.log(f"📤 get_xdg_surface -> {xdg_id}")
+            if _DEBUG: self._log(f"📤 get_xdg_surface -> {xdg_id}")
         return res
 
-    def handle_xdg_surface(self, oid, op, pay):
+    def handle_xdg_surface(self, oid, op, pay, fds):
         res = []
         pos = 0
         if op == 1: # get_toplevel
             tid, pos = self.read_uint(pay, pos)
             self.objects[tid] = ("xdg_toplevel", 3)
             res.append(self.encode_message(tid, 0, 800, 600, b''))
-            res.append(self.encode_message(oid, 0, self.next_serial()))
-            self.proxy.log(f"📤 get_toplevel -> {tid}")
+            res.append(self.encode_uints(oid, 0, self.next_serial()))
+            if _DEBUG: self._log(f"📤 get_toplevel -> {tid}")
             self.try_focus()
         return res
 
-    def handle_xdg_toplevel(self, oid, op, pay):
+    def handle_xdg_toplevel(self, oid, op, pay, fds):
+        return []
+
+    def handle_callback(self, oid, op, pay, fds):
+        # Callbacks are server->client only
         return []
         
-    def handle_seat(self, oid, op, pay):
+    def handle_seat(self, oid, op, pay, fds):
         pos = 0
         if op == 0: # get_pointer
             nid, pos = self.read_uint(pay, pos)
             self.objects[nid] = ("wl_pointer", 1)
-            self.proxy.log(f"📤 get_pointer -> {nid}")
+            self.pointers.add(nid)
+            if _DEBUG: self._log(f"📤 get_pointer -> {nid}")
             self.try_focus()
 
         elif op == 1: # get_keyboard
             nid, pos = self.read_uint(pay, pos)
             self.objects[nid] = ("wl_keyboard", 1)
-            self.proxy.log(f"📤 get_keyboard -> {nid}")
+            self.keyboards.add(nid)
+            if _DEBUG: self._log(f"📤 get_keyboard -> {nid}")
             self.try_focus()
         return []
 
+    def handle_pointer(self, oid, op, pay, fds):
+        if op == 1: # release
+            if oid in self.objects: del self.objects[oid]
+            self.pointers.discard(oid)
+        return []
+
+    def handle_keyboard(self, oid, op, pay, fds):
+        if op == 0: # release
+            if oid in self.objects: del self.objects[oid]
+            self.keyboards.discard(oid)
+        return []
+
 class WaylandProxy:
     def __init__(self, port=9999):
         self.port = port
         self.tcp_socket = None
         self.clients = {} # sock -> WaylandClient
         self.mode = 'tcp'
+        self.write_stdout = None # os.writev bound to the raw stdout fd
+        self.pending = []        # queued PIXL iovecs, see flush_pixl
+        self.motion_buf = bytearray(_POINTER_MOTION.size) # reused per motion event
 
     def log(self, msg):
         sys.stderr.write(f"{msg}\n")
         sys.stderr.flush()
 
-    def send_pixl(self, sid, buf, pools):
-        # In Stdio mode, write to stdout
+    def queue_pixl(self, sid, buf, pools):
+        # Queue a PIXL frame, flush_pixl writes everything queued at once
         pid, off, w, h, stride, fmt = buf
         if pid not in pools: return
-        fd, mm, sz = pools[pid]
+        fd, mm, mv, sz = pools[pid]
         if not mm: return
         
         try:
             row = w*4
-            if off + stride * h > sz: return
+            if stride < row or off + stride * h > sz: return
+            total_len = row * h
+            hdr = _PIXL_HDR.pack(b'PIXL', sid, w, h, fmt, total_len)
             
-            # Calculate size
-            total_len = 0
-            for y in range(h):
-                off_y = off + y*stride
-                if off_y + row > sz: break
-                total_len += row
-                
-            hdr = struct.pack('<4sIIIII', b'PIXL', sid, w, h, fmt, total_len)
+            # Prefetch the buffer's pages before we walk them (hint only)
+            start = off & PAGE_MASK
+            length = off + stride * h - start
+            if length > 0:
+                try:
+                    mm.madvise(mmap.MADV_WILLNEED, start, length)
+                except (OSError, ValueError):
+                    pass
             
-            if self.mode == 'stdio':
-                sys.stdout.buffer.write(hdr)
+            if stride == row:
+                # Rows are contiguous, send straight out of the mapping
+                iov = [hdr, mv[off:off + total_len]]
+            elif np is not None:
+                # Strip the stride padding with one vectorized 2D copy
+                rows = np.frombuffer(mv, np.uint8, stride * h, off).reshape(h, stride)
+                iov = [hdr, np.ascontiguousarray(rows[:, :row])]
+            else:
+                # One iovec per row, the kernel gathers them
+                iov = [hdr]
                 for y in range(h):
                     off_y = off + y*stride
-                    if off_y + row > sz: break
-                    mm.seek(off_y)
-                    sys.stdout.buffer.write(mm.read(row))
-                sys.stdout.buffer.flush()
+                    iov.append(mv[off_y:off_y + row])
+            self.pending.extend(iov)
+            # self.log(f"🖼️ Queued PIXL {w}x{h}")
+        except Exception as e:
+            self.log(f"⚠️ Queue PIXL fail: {e}")
+
+    def flush_pixl(self):
+        # Frames are self-delimiting (PIXL header carries the length), so
+        # all commits from one client read go out in a single writev/sendmsg.
+        # Must run before buffers are released or pools unmapped.
+        if not self.pending: return
+        iov, self.pending = self.pending, []
+        try:
+            if self.mode == 'stdio':
+                write_iov(self.write_stdout, iov)
             elif self.tcp_socket:
-                self.tcp_socket.sendall(hdr)
-                for y in range(h):
-                    off_y = off + y*stride
-                    if off_y + row > sz: break
-                    mm.seek(off_y)
-                    self.tcp_socket.sendall(mm.read(row))
-                    
-            # self.log(f"🖼️ Sent PIXL {w}x{h}")
+                write_iov(self.tcp_socket.sendmsg, iov)
         except Exception as e:
             self.log(f"⚠️ Send PIXL fail: {e}")
 
     def broadcast_input(self, data):
         if len(data) < 20: return
-        if data[0:4] != b'INPT': return
         
         try:
-            type_code = struct.unpack('<I', data[4:8])[0]
-            p1 = struct.unpack('<I', data[8:12])[0]
-            p2 = struct.unpack('<I', data[12:16])[0]
+            magic, type_code, p1, p2 = _INPT.unpack_from(data)
+            if magic != b'INPT': return
             
-            self.log(f"📥 INPT {type_code}")
+            if _DEBUG: self.log(f"📥 INPT {type_code}")
+            
+            now = int(time.time()*1000) & 0xFFFFFFFF
+            # 24.8 fixed point; masking keeps the two's complement bits of negative coords
+            fx, fy = (p1 << 8) & 0xFFFFFFFF, (p2 << 8) & 0xFFFFFFFF
+            pack_key = _KEY_EVENT.pack
+            pack_motion_into = _POINTER_MOTION.pack_into
+            motion_buf = self.motion_buf
             
             for cli in self.clients.values():
                 ser = cli.next_serial()
-                now = int(time.time()*1000) & 0xFFFFFFFF
-                
-                keys = [k for k,v in cli.objects.items() if v[0] == "wl_keyboard"]
-                ptrs = [k for k,v in cli.objects.items() if v[0] == "wl_pointer"]
+                send = cli.send
                 
-                msgs = []
                 if type_code == 1: # Key
-                    for k in keys:
-                        msgs.append(cli.encode_message(k, 3, ser, now, p2, p1))
+                    for k in cli.keyboards:
+                        send(pack_key(k, _KEY_EVENT_WORD, ser, now, p2, p1))
                 elif type_code == 2: # Motion
-                    fx, fy = int(p1)*256, int(p2)*256
-                    for p in ptrs:
-                        msgs.append(cli.encode_message(p, 2, now, fx, fy))
+                    for p in cli.pointers:
+                        # sendall copies it out, so the buffer can be reused
+                        pack_motion_into(motion_buf, 0, p, _POINTER_MOTION_WORD, now, fx, fy)
+                        send(motion_buf)
                 elif type_code == 3: # Button
-                    for p in ptrs:
-                        msgs.append(cli.encode_message(p, 3, ser, now, p2, p1))
-                        
-                for m in msgs:
-                    cli.send(m)
+                    for p in cli.pointers:
+                        send(pack_key(p, _KEY_EVENT_WORD, ser, now, p2, p1))
         except:
             pass
 
@@ -480,77 +556,115 @@ class WaylandProxy:
         self.log(f"🚀 Listening on {socket_path}")
         
         # Stdin is blocking, so use select
+        # PIXL goes straight to the raw fd, bypassing Python's stdio buffer
+        sys.stdout.flush()
+        stdout_fd = sys.stdout.fileno()
+        os.set_blocking(stdout_fd, True)
+        self.write_stdout = functools.partial(os.writev, stdout_fd)
+        
         stdin_fd = sys.stdin.fileno()
         try:
              os.set_blocking(stdin_fd, False)
         except: pass
         
-        buf = bytearray()
+        # Fixed stdin buffer, data lives between r and w
+        stdin_raw = sys.stdin.buffer.raw
+        buf = bytearray(1 << 20)
+        mv = memoryview(buf)
+        r = w = 0
+        
+        # Register once, epoll (on Linux) only reports the ready fds
+        sel = selectors.DefaultSelector()
+        sel.register(srv, selectors.EVENT_READ, ('srv', None))
+        sel.register(stdin_fd, selectors.EVENT_READ, ('stdin', None))
         
         while True:
-            rlist = [srv, stdin_fd] + list(self.clients.keys())
-            
-            ready, _, _ = select.select(rlist, [], [], 0.01)
-            
-            for s in ready:
-                if s == srv:
+            for key, _ in sel.select(0.01):
+                kind, wc = key.data
+                if kind == 'srv':
                     cli, addr = srv.accept()
                     wc = WaylandClient(cli, self)
                     self.clients[cli] = wc
+                    sel.register(cli, selectors.EVENT_READ, ('cli', wc))
                     self.log("📥 Client +")
-                elif s == stdin_fd:
-                    # Read from Stdin (Data from Windows)
+                elif kind == 'stdin':
+                    # Read from Stdin (Data from Windows) until it runs dry
                     try:
-                         # Using os.read for unbuffered raw read
-                        d = os.read(stdin_fd, 65536)
-                        if not d:
-                            self.log("⚠️ Stdin EOF (Windows closed)")
-                            return
-                        buf.extend(d)
-                        while len(buf) >= 8:
-                            # Check INPT (Fixed 20 bytes)
-                            if len(buf) >= 20 and buf[0:4] == b'INPT':
-                                self.broadcast_input(buf[0:20])
-                                del buf[0:20]
-                                continue
+                        while True:
+                            if w == len(buf):
+                                if r == 0:
+                                    # Nothing parseable in a full buffer, drop it
+                                    self.log("⚠️ Stdin buffer full, dropping")
+                                    r = w
+                                mv[:w-r] = mv[r:w]
+                                w -= r
+                                r = 0
+                            # Unbuffered raw read straight into the free space
+                            n = stdin_raw.readinto(mv[w:])
+                            if n is None: break
+                            if not n:
+                                self.log("⚠️ Stdin EOF (Windows closed)")
+                                return
+                            w += n
+                            while w - r >= 8:
+                                # Check INPT (Fixed 20 bytes)
+                                if w - r >= 20 and buf.startswith(b'INPT', r):
+                                    self.broadcast_input(mv[r:r+20])
+                                    r += 20
+                                    continue
                                 
-                            # Check Wayland Message
-                            # Decode header (8 bytes)
-                            oid, op_sz = struct.unpack('<II', buf[0:8])
-                            size = op_sz >> 16
+                                # Check Wayland Message
+                                # Decode header (8 bytes)
+                                oid, op_sz = _WL_HDR.unpack_from(buf, r)
+                                size = op_sz >> 16
                             
-                            if size < 8:
-                                # Invalid size, maybe garbage? Discard 1 byte
-                                del buf[0]
-                                continue
+                                if size < 8:
+                                    # Invalid size, maybe garbage? Discard 1 byte
+                                    r += 1
+                                    continue
                                 
-                            if len(buf) >= size:
-                                packet = buf[0:size]
-                                # Broadcast to all clients (Simple muxing)
-                                for cli in self.clients.values():
-                                    cli.send(packet)
-                                del buf[0:size]
-                            else:
-                                # Wait for more data
-                                break
+                                if w - r >= size:
+                                    # Broadcast to all clients (Simple muxing), no copy
+                                    packet = mv[r:r+size]
+                                    for cli in self.clients.values():
+                                        cli.send(packet)
+                                    r += size
+                                else:
+                                    # Wait for more data
+                                    break
+                            if r == w:
+                                r = w = 0
+                            elif r > len(buf) // 2:
+                                # Move the partial tail back to the front in one go
+                                mv[:w-r] = mv[r:w]
+                                w -= r
+                                r = 0
                     except BlockingIOError: pass
                     except Exception as e:
                          self.log(f"❌ Stdin Read Err: {e}")
 
-                elif s in self.clients:
-                    wc = self.clients[s]
+                else:
+                    s = key.fileobj
                     try:
-                        d, anc, f, a = s.recvmsg(65536, socket.CMSG_LEN(1024))
-                        if d:
+                        # Drain everything queued, only the first recvmsg may block
+                        flags = 0
+                        while True:
+                            try:
+                                d, anc, f, a = s.recvmsg(65536, ANC_BUFSIZE, flags)
+                            except BlockingIOError:
+                                break
+                            if not d:
+                                raise Exception("EOF")
                             fds = []
                             for l, t, cd in anc:
-                                if l == socket.SOL_SOCKET and t == socket.SCM_RIGHTS:
-                                    n = len(cd)//4
-                                    fds.extend(struct.unpack(f'{n}i', cd[:n*4]))
+                                if l == SOL_SOCKET and t == SCM_RIGHTS:
+                                    fa = array.array('i')
+                                    fa.frombytes(cd[:len(cd) & ~3])
+                                    fds.extend(fa)
                             wc.handle_message(d, fds)
-                        else:
-                            raise Exception("EOF")
+                            flags = MSG_DONTWAIT
                     except Exception as e:
+                        sel.unregister(s)
                         wc.close()
                         del self.clients[s]
                         self.log("📤 Client -")